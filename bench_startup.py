@@ -0,0 +1,68 @@
+# Course: 261
+# Author: Savanna Hanson
+# Assignment: 5 - Graph Implementation
+# Description: Startup-time benchmark. Runs a fresh interpreter that imports both graph modules,
+# builds a small graph and answers one query, and checks that it stays under a fixed
+# millisecond budget on top of bare interpreter startup and never imports the heavy backends.
+# Usage: python bench_startup.py [budget_ms]
+
+import os
+import subprocess
+import sys
+import time
+
+
+# extra milliseconds allowed for import + one small query, on top of bare interpreter startup
+BUDGET_MS = 30
+RUNS = 15
+
+SMALL_QUERY = '''
+import sys
+from d_graph import DirectedGraph
+from ud_graph import UndirectedGraph
+
+g = DirectedGraph([(0, 1, 10), (4, 0, 12), (1, 4, 15), (4, 3, 3), (3, 1, 5), (2, 1, 23), (3, 2, 7)])
+g.dijkstra(0)
+g.is_valid_path([0, 1, 4, 3])
+u = UndirectedGraph(['AB', 'AC', 'BC', 'BD', 'CD', 'CE', 'DE'])
+u.bfs('A')
+
+heavy = [name for name in ('numpy', 'multiprocessing', 'mmap') if name in sys.modules]
+if heavy:
+    sys.exit('heavy backends imported: ' + ', '.join(heavy))
+'''
+
+
+def best_time(code) -> float:
+    """
+    Returns the fastest of RUNS cold runs of CODE in a new interpreter, in milliseconds
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    env.pop('GRAPH_KERNEL', None)
+    best = float('inf')
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-c', code], cwd=here, env=env,
+                                capture_output=True, text=True)
+        elapsed = (time.perf_counter() - start) * 1000
+        if result.returncode != 0:
+            sys.exit(result.stderr.strip())
+        best = min(best, elapsed)
+    return best
+
+
+if __name__ == '__main__':
+
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else BUDGET_MS
+
+    bare = best_time('pass')
+    query = best_time(SMALL_QUERY)
+    extra = query - bare
+
+    print(f'bare interpreter:         {bare:7.1f} ms')
+    print(f'import + one small query: {query:7.1f} ms')
+    print(f'overhead:                 {extra:7.1f} ms (budget {budget:.0f} ms)')
+
+    if extra > budget:
+        sys.exit('startup budget exceeded')
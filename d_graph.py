@@ -3,12 +3,17 @@
 # Assignment: 5 - Graph Implementation
 # Description: An directed graph ADT with vertices and edges stored as an adjacency matrix.
 # Methods include add_vertex, add_edge, remove_edge, get_vertices, get_edges, is_valid_path,
-# dfs, bfs, has_cycle, and dijksta.
+# dfs, bfs, has_cycle, and dijksta. Shortest path trees of registered sources are kept
+# up to date as edges change (register_source, get_distance). validate_paths checks many paths at once.
+# Degree counters are maintained incrementally (degree, in_degree, out_degree, top_degree).
 
 
 import heapq
 from collections import deque
 
+from degree_index import DegreeIndex
+from path_kernels import EdgeIndex, to_ragged, validate_ragged
+
 
 class DirectedGraph:
     """
@@ -62,6 +67,8 @@ class DirectedGraph:
         Adds a new vertex to the graph, by increasing the adjacency matrix by 1.
         Default weight is 0, and v_count is incremented.
         """
+        index, in_degree, out_degree = self._get_degrees()
+        entry = self._encode('add_vertex')
 
         self.v_count += 1
 
@@ -73,6 +80,18 @@ class DirectedGraph:
 
         self.adj_matrix.append(new)
 
+        # new vertex is unreachable from every registered source
+        for dist, parent, children in self._get_sp_trees().values():
+            dist.append(float('inf'))
+            parent.append(None)
+            children.append(set())
+
+        in_degree.append(0)
+        out_degree.append(0)
+        index.add(self.v_count - 1)
+
+        self._record(entry)
+
         return self.v_count
 
 
@@ -82,15 +101,36 @@ class DirectedGraph:
         exist in the graph, or if the weight is not a positive integer, or if the src
         and dst are the same vertex. If the edge is already present, the weight is updated.
         """
-        if src > self.v_count - 1 or dst > self.v_count - 1:
+        if src > self.v_count - 1 or src < 0 or dst > self.v_count - 1 or dst < 0:
             return
         if weight < 1:
             return
         if src == dst:
             return
 
+        index, in_degree, out_degree = self._get_degrees()
+        old = self.adj_matrix[src][dst]
+        if old == weight:
+            # nothing changes, so there is nothing to repair or record
+            return
+        entry = self._encode('add_edge', src, dst, weight)
+
+        if old == 0:
+            index.change(src, 1)
+            index.change(dst, 1)
+            out_degree[src] += 1
+            in_degree[dst] += 1
+
         self.adj_matrix[src][dst] = weight
 
+        # repair the registered shortest path trees
+        if old == 0 or weight < old:
+            self._sp_decrease(src, dst, weight)
+        elif weight > old:
+            self._sp_increase(src, dst)
+
+        self._record(entry)
+
 
     def remove_edge(self, src: int, dst: int) -> None:
         """
@@ -100,7 +140,91 @@ class DirectedGraph:
         if src > self.v_count - 1 or src < 0 or dst > self.v_count - 1 or dst < 0:
             return
 
+        index, in_degree, out_degree = self._get_degrees()
+        if self.adj_matrix[src][dst] == 0:
+            return
+        entry = self._encode('remove_edge', src, dst)
+
+        index.change(src, -1)
+        index.change(dst, -1)
+        out_degree[src] -= 1
+        in_degree[dst] -= 1
         self.adj_matrix[src][dst] = 0
+        self._sp_increase(src, dst)
+        self._record(entry)
+
+    def _encode(self, op, *args):
+        """
+        Encodes a mutation for the attached GraphLog (see graph_log.py) before it is applied,
+        so a value the log cannot store raises before the graph changes. Returns None if no
+        log is attached.
+        """
+        log = getattr(self, '_mutation_log', None)
+        if log is None:
+            return None
+        return log.encode(op, args)
+
+    def _record(self, entry) -> None:
+        """
+        Writes a mutation encoded by _encode to the attached GraphLog, if there is one.
+        Every mutation goes through here, so it also drops the cached edge index.
+        """
+        self._edge_index = None
+        if entry is not None:
+            self._mutation_log.append(entry)
+
+    def _get_degrees(self):
+        """
+        Returns the degree counters as a tuple of (DegreeIndex of in + out degree, in-degree list,
+        out-degree list). They are built from the matrix the first time and kept up to date by
+        add_vertex, add_edge and remove_edge afterwards.
+        """
+        if not hasattr(self, '_degree_index'):
+            self._in_degree = [0] * self.v_count
+            self._out_degree = [0] * self.v_count
+            for src, dst, _ in self.get_edges():
+                self._out_degree[src] += 1
+                self._in_degree[dst] += 1
+            self._degree_index = DegreeIndex(
+                {v: self._in_degree[v] + self._out_degree[v] for v in range(self.v_count)})
+        return self._degree_index, self._in_degree, self._out_degree
+
+    def degree(self, v: int):
+        """
+        Returns the number of edges going in or out of vertex v, or None if v does not exist.
+        """
+        if v > self.v_count - 1 or v < 0:
+            return None
+        return self._get_degrees()[0].degree[v]
+
+    def in_degree(self, v: int):
+        """
+        Returns the number of edges going into vertex v, or None if v does not exist.
+        """
+        if v > self.v_count - 1 or v < 0:
+            return None
+        return self._get_degrees()[1][v]
+
+    def out_degree(self, v: int):
+        """
+        Returns the number of edges going out of vertex v, or None if v does not exist.
+        """
+        if v > self.v_count - 1 or v < 0:
+            return None
+        return self._get_degrees()[2][v]
+
+    def top_degree(self, k: int) -> []:
+        """
+        Returns up to k (vertex, degree) tuples for the vertices with the highest degree,
+        highest first.
+        """
+        return self._get_degrees()[0].top(k)
+
+    def degree_histogram(self) -> dict:
+        """
+        Returns a dict with degree as key and the number of vertices with that degree as value.
+        """
+        return self._get_degrees()[0].histogram()
 
     def get_vertices(self) -> []:
         """
@@ -156,6 +280,22 @@ class DirectedGraph:
                 return False
         return True
 
+    def validate_paths(self, paths=None, flat=None, offsets=None):
+        """
+        Validates many paths at once. Takes either a list of PATHS, or a ragged array given as
+        FLAT vertices and OFFSETS (path i is flat[offsets[i]:offsets[i + 1]]). Returns a boolean
+        array (True where the path is valid, same rules as is_valid_path) and the index of the
+        first failing hop of each path, -1 if valid. Both are NumPy arrays; NumPy is imported
+        on the first call.
+        """
+        flat, offsets = to_ragged(paths, flat, offsets)
+
+        # built once per graph state, add_vertex / add_edge / remove_edge drop it in _record
+        if getattr(self, '_edge_index', None) is None:
+            self._edge_index = EdgeIndex.from_matrix(self.adj_matrix)
+
+        return validate_ragged(flat, offsets, self._edge_index)
+
 
     def dfs(self, v_start, v_end=None) -> []:
         """
@@ -282,6 +422,11 @@ class DirectedGraph:
         If a certain vertex is not reachable from SRC, returned value is infinity.
         """
 
+        # registered sources already have an up to date tree
+        trees = self._get_sp_trees()
+        if src in trees:
+            return list(trees[src][0])
+
         visited_table = {}
         # key is the vertex v
         # value is th min distance d to vertex v
@@ -332,6 +477,130 @@ class DirectedGraph:
 
         return distance
 
+    def register_source(self, src: int) -> None:
+        """
+        Registers SRC as a source whose shortest path tree is maintained as edges are added,
+        removed, or re-weighted, so that its distances can be read without re-running Dijkstra.
+        If SRC does not exist in the graph, the method does nothing.
+        """
+        if src > self.v_count - 1 or src < 0:
+            return
+
+        trees = self._get_sp_trees()
+        if src not in trees:
+            dist = [float('inf')] * self.v_count
+            dist[src] = 0
+            trees[src] = (dist, [None] * self.v_count, [set() for _ in range(self.v_count)])
+            self._sp_relax(trees[src], [(0, src)])
+
+    def unregister_source(self, src: int) -> None:
+        """
+        Stops maintaining the shortest path tree of SRC. Does nothing if SRC is not registered.
+        """
+        self._get_sp_trees().pop(src, None)
+
+    def get_distance(self, src: int, dst: int):
+        """
+        Returns the length of the shortest path from SRC to DST, or infinity if DST is not
+        reachable. Registered sources are answered from their maintained tree in O(1),
+        any other source falls back to a full dijkstra() run.
+        """
+        trees = self._get_sp_trees()
+        if src in trees:
+            return trees[src][0][dst]
+        return self.dijkstra(src)[dst]
+
+    def _get_sp_trees(self) -> dict:
+        """
+        Returns the maintained shortest path trees. Key is the source vertex, value is a
+        tuple of (distance list, parent list, children list of sets) indexed by vertex.
+        """
+        if not hasattr(self, '_sp_trees'):
+            self._sp_trees = {}
+        return self._sp_trees
+
+    def _sp_set_parent(self, tree, v, p) -> None:
+        """
+        Helper for the maintained shortest path trees. Makes p the parent of v (None to detach v)
+        and keeps the children sets in step with the parent list.
+        """
+        _, parent, children = tree
+        if parent[v] is not None:
+            children[parent[v]].discard(v)
+        parent[v] = p
+        if p is not None:
+            children[p].add(v)
+
+    def _sp_relax(self, tree, hq) -> None:
+        """
+        Helper for the maintained shortest path trees. Runs Dijkstra relaxation
+        starting from the (distance, vertex) entries in hq, only lowering distances
+        that can be improved.
+        """
+        dist = tree[0]
+        heapq.heapify(hq)
+        while hq:
+            (d, v) = heapq.heappop(hq)
+            if d > dist[v]:
+                # stale entry, v was already settled with a shorter distance
+                continue
+            row = self.adj_matrix[v]
+            for i in range(self.v_count):
+                cost = row[i]
+                if cost and d + cost < dist[i]:
+                    dist[i] = d + cost
+                    self._sp_set_parent(tree, i, v)
+                    heapq.heappush(hq, (dist[i], i))
+
+    def _sp_decrease(self, src: int, dst: int, weight) -> None:
+        """
+        Repairs the maintained trees after edge (src, dst) was inserted or its weight lowered.
+        Only vertices whose distance improves through the edge are touched.
+        """
+        for tree in self._get_sp_trees().values():
+            dist = tree[0]
+            d = dist[src] + weight
+            if d < dist[dst]:
+                dist[dst] = d
+                self._sp_set_parent(tree, dst, src)
+                self._sp_relax(tree, [(d, dst)])
+
+    def _sp_increase(self, src: int, dst: int) -> None:
+        """
+        Repairs the maintained trees after edge (src, dst) was removed or its weight raised
+        (Ramalingam-Reps style). If the edge is in a tree, only the subtree below dst is
+        invalidated and recomputed from the unaffected vertices, otherwise the tree is left as is.
+        """
+        for tree in self._get_sp_trees().values():
+            dist, parent, children = tree
+            if parent[dst] != src:
+                continue
+
+            # collect the subtree rooted at dst
+            affected = set()
+            stack = [dst]
+            while stack:
+                v = stack.pop()
+                affected.add(v)
+                stack.extend(children[v])
+
+            for v in affected:
+                dist[v] = float('inf')
+                self._sp_set_parent(tree, v, None)
+
+            # seed each affected vertex with its best edge from the unaffected part
+            hq = []
+            for v in affected:
+                for u in range(self.v_count):
+                    cost = self.adj_matrix[u][v]
+                    if cost and u not in affected and dist[u] + cost < dist[v]:
+                        dist[v] = dist[u] + cost
+                        self._sp_set_parent(tree, v, u)
+                if parent[v] is not None:
+                    hq.append((dist[v], v))
+
+            self._sp_relax(tree, hq)
+
 
 if __name__ == '__main__':
 
@@ -411,3 +680,16 @@ if __name__ == '__main__':
     print('\n', g)
     for i in range(5):
         print(f'DIJKSTRA {i} {g.dijkstra(i)}')
+
+
+    print("\nmethod register_source() / get_distance() example 1")
+    print("---------------------------------------------------")
+    edges = [(0, 1, 10), (4, 0, 12), (1, 4, 15), (4, 3, 3),
+             (3, 1, 5), (2, 1, 23), (3, 2, 7)]
+    g = DirectedGraph(edges)
+    g.register_source(0)
+    print(f'DIJKSTRA 0 {g.dijkstra(0)}')
+    g.add_edge(0, 3, 2)
+    print(f'DIJKSTRA 0 {g.dijkstra(0)} DISTANCE 0->2 {g.get_distance(0, 2)}')
+    g.remove_edge(0, 3)
+    print(f'DIJKSTRA 0 {g.dijkstra(0)} DISTANCE 0->2 {g.get_distance(0, 2)}')
@@ -0,0 +1,156 @@
+# Course: 261
+# Author: Savanna Hanson
+# Assignment: 5 - Graph Implementation
+# Description: Degree counters bucketed by degree, shared by DirectedGraph and UndirectedGraph.
+# The graphs update it on every mutation so degree lookups, degree histograms and
+# highest-degree queries never scan the graph.
+
+
+class DegreeIndex:
+    """
+    Class to implement a bucket index of vertex degrees
+    - degree maps each vertex to its degree
+    - buckets maps each degree to the vertices with that degree (dict used as ordered set)
+    - only non-empty buckets exist, and they are linked in degree order through
+      higher / lower, from min_degree up to max_degree (both None when empty)
+    """
+
+    def __init__(self, degrees=None):
+        """
+        Start with the vertices in DEGREES (dict of vertex -> degree), or with no vertices
+        """
+        self.degree = {}
+        self.buckets = {}
+        self.higher = {}
+        self.lower = {}
+        self.min_degree = None
+        self.max_degree = None
+
+        if degrees:
+            for v, d in degrees.items():
+                self.degree[v] = d
+                self.buckets.setdefault(d, {})[v] = None
+            # link all buckets at once instead of searching for each one
+            prev = None
+            for d in sorted(self.buckets):
+                self.lower[d] = prev
+                self.higher[d] = None
+                if prev is not None:
+                    self.higher[prev] = d
+                prev = d
+            self.min_degree = min(self.buckets)
+            self.max_degree = prev
+
+    def add(self, v, degree=0) -> None:
+        """
+        Adds vertex v with the given degree. Does nothing if v is already indexed.
+        """
+        if v in self.degree:
+            return
+        if self.min_degree is None or abs(degree - self.min_degree) <= abs(degree - self.max_degree):
+            near = self.min_degree
+        else:
+            near = self.max_degree
+        self.degree[v] = degree
+        self._bucket(v, degree, near)
+
+    def remove(self, v) -> None:
+        """
+        Removes vertex v from the index. Does nothing if v is not indexed.
+        """
+        if v not in self.degree:
+            return
+        self._unbucket(v, self.degree.pop(v))
+
+    def change(self, v, delta) -> None:
+        """
+        Adds delta to the degree of vertex v. The new bucket is linked next to the old one,
+        so this is O(1) for the +1 / -1 changes the graphs make.
+        """
+        old = self.degree[v]
+        new = old + delta
+        self.degree[v] = new
+        # link the new bucket while the old one is still there to search from
+        self._bucket(v, new, old)
+        self._unbucket(v, old)
+
+    def top(self, k) -> []:
+        """
+        Returns up to k (vertex, degree) tuples with the highest degrees, highest first.
+        Only non-empty buckets are visited, so this is O(k).
+        """
+        result = []
+        d = self.max_degree
+        while d is not None and len(result) < k:
+            for v in self.buckets[d]:
+                result.append((v, d))
+                if len(result) == k:
+                    break
+            d = self.lower[d]
+        return result
+
+    def histogram(self) -> dict:
+        """
+        Returns a dict with degree as key and number of vertices with that degree as value,
+        in increasing degree order
+        """
+        hist = {}
+        d = self.min_degree
+        while d is not None:
+            hist[d] = len(self.buckets[d])
+            d = self.higher[d]
+        return hist
+
+    def _bucket(self, v, degree, near) -> None:
+        """
+        Helper that puts v in the bucket for degree. A new bucket is linked into the list by
+        searching from the non-empty degree NEAR (None when the index is empty).
+        """
+        if degree in self.buckets:
+            self.buckets[degree][v] = None
+            return
+        self.buckets[degree] = {v: None}
+
+        # find the closest non-empty degrees below (lo) and above (hi)
+        if near is None:
+            lo = hi = None
+        elif near < degree:
+            lo = near
+            while self.higher[lo] is not None and self.higher[lo] < degree:
+                lo = self.higher[lo]
+            hi = self.higher[lo]
+        else:
+            hi = near
+            while self.lower[hi] is not None and self.lower[hi] > degree:
+                hi = self.lower[hi]
+            lo = self.lower[hi]
+
+        self.lower[degree] = lo
+        self.higher[degree] = hi
+        if lo is None:
+            self.min_degree = degree
+        else:
+            self.higher[lo] = degree
+        if hi is None:
+            self.max_degree = degree
+        else:
+            self.lower[hi] = degree
+
+    def _unbucket(self, v, degree) -> None:
+        """Helper that takes v out of its bucket and unlinks the bucket when it gets empty"""
+        bucket = self.buckets[degree]
+        del bucket[v]
+        if bucket:
+            return
+        del self.buckets[degree]
+
+        lo = self.lower.pop(degree)
+        hi = self.higher.pop(degree)
+        if lo is None:
+            self.min_degree = hi
+        else:
+            self.higher[lo] = hi
+        if hi is None:
+            self.max_degree = lo
+        else:
+            self.lower[hi] = lo
@@ -0,0 +1,333 @@
+# Course: 261
+# Author: Savanna Hanson
+# Assignment: 5 - Graph Implementation
+# Description: An optional append-only mutation log for DirectedGraph and UndirectedGraph.
+# add_vertex / add_edge / remove_edge / remove_vertex calls are written in a compact binary
+# format and fsynced in batches. Periodic compacted snapshots keep the log short, so recovery
+# loads the latest snapshot and only replays the log tail written after it.
+
+import numbers
+import os
+import struct
+import zlib
+
+
+# record op codes, replayed by calling the graph method of the same name
+OPS = {1: 'add_vertex', 2: 'add_edge', 3: 'remove_edge', 4: 'remove_vertex'}
+OP_CODES = {name: code for code, name in OPS.items()}
+
+SNAPSHOT_MAGIC = b'GSNP'
+
+# frame = payload length, crc32 of payload, payload
+FRAME = struct.Struct('<II')
+# payload header = sequence number, op code, number of arguments
+HEADER = struct.Struct('<QBB')
+SEQ = struct.Struct('<Q')
+BODY = struct.Struct('<BB')
+INT = struct.Struct('<q')
+FLOAT = struct.Struct('<d')
+STR_LEN = struct.Struct('<H')
+
+
+def encode_body(op, args) -> bytes:
+    """
+    Encodes one mutation without its sequence number.
+    Arguments are tagged as int (i), float (d) or string (s). Any integral number (bool,
+    numpy.int64, ...) is stored as int and any other real number as float, so replay gets
+    back plain Python values. Raises TypeError for any other type, and ValueError for an
+    int outside 64 bits or a string longer than 65535 bytes.
+    """
+    body = bytearray(BODY.pack(OP_CODES[op], len(args)))
+    for arg in args:
+        if isinstance(arg, str):
+            data = arg.encode('utf-8')
+            if len(data) > 0xFFFF:
+                raise ValueError(f'cannot log a string of {len(data)} bytes, the limit is 65535')
+            body += b's' + STR_LEN.pack(len(data)) + data
+        elif isinstance(arg, numbers.Integral):
+            value = int(arg)
+            if not -2 ** 63 <= value < 2 ** 63:
+                raise ValueError(f'cannot log {value}, ints are limited to 64 bits')
+            body += b'i' + INT.pack(value)
+        elif isinstance(arg, numbers.Real):
+            body += b'd' + FLOAT.pack(float(arg))
+        else:
+            raise TypeError(f'cannot log a {type(arg).__name__} argument of {op}')
+    return bytes(body)
+
+
+def frame_record(seq, body) -> bytes:
+    """
+    Returns the framed binary record of an encoded BODY with sequence number SEQ
+    """
+    payload = SEQ.pack(seq) + body
+    return FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def encode_record(seq, op, args) -> bytes:
+    """
+    Encodes one mutation as a framed binary record, see encode_body()
+    """
+    return frame_record(seq, encode_body(op, args))
+
+
+def decode_records(data, pos=0):
+    """
+    Generator over the records in DATA starting at offset POS. Yields (end offset, seq, op, args)
+    and stops at the first truncated or corrupted frame, which is where a crash cut the log.
+    """
+    while pos + FRAME.size <= len(data):
+        length, crc = FRAME.unpack_from(data, pos)
+        start = pos + FRAME.size
+        end = start + length
+        if end > len(data) or zlib.crc32(data[start:end]) != crc:
+            return
+
+        seq, code, argc = HEADER.unpack_from(data, start)
+        offset = start + HEADER.size
+        args = []
+        for _ in range(argc):
+            tag = data[offset:offset + 1]
+            offset += 1
+            if tag == b'i':
+                args.append(INT.unpack_from(data, offset)[0])
+                offset += INT.size
+            elif tag == b'd':
+                args.append(FLOAT.unpack_from(data, offset)[0])
+                offset += FLOAT.size
+            else:
+                (size,) = STR_LEN.unpack_from(data, offset)
+                offset += STR_LEN.size
+                args.append(data[offset:offset + size].decode('utf-8'))
+                offset += size
+
+        yield end, seq, OPS[code], args
+        pos = end
+
+
+def map_file(f):
+    """
+    Maps the open file F read-only, so snapshots and logs are decoded without copying them
+    into memory. mmap is only imported when a log is actually recovered.
+    """
+    import mmap
+
+    if os.fstat(f.fileno()).st_size == 0:
+        return b''
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def fsync_dir(path) -> None:
+    """
+    Fsyncs the directory PATH so renames inside it survive a crash
+    """
+    fd = os.open(path or '.', os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class GraphLog:
+    """
+    Class to implement a write-ahead mutation log with snapshots
+    - PATH.wal holds the records written since the latest snapshot
+    - PATH.snap holds the latest compacted snapshot
+    - records are fsynced every sync_every records, on flush() and on close()
+    - a snapshot is taken automatically every snapshot_every records (None to disable)
+    """
+
+    def __init__(self, path, sync_every=64, snapshot_every=10000):
+        """
+        Store file names and batching options. No file is opened until recover() or attach().
+        """
+        self.log_path = path + '.wal'
+        self.snap_path = path + '.snap'
+        self.sync_every = sync_every
+        self.snapshot_every = snapshot_every
+
+        self.graph = None
+        self.file = None
+        self.seq = 0
+        self.buffer = bytearray()
+        self.pending = 0
+        self.since_snapshot = 0
+
+    # ------------------------------------------------------------------ #
+
+    def recover(self, graph_class):
+        """
+        Rebuilds a graph of GRAPH_CLASS from the latest snapshot plus the log tail, attaches
+        the log to it and returns it. A torn record at the end of the log is cut off, a
+        damaged snapshot raises ValueError.
+        """
+        graph = graph_class()
+        snap_seq = 0
+
+        if os.path.exists(self.snap_path):
+            with open(self.snap_path, 'rb') as f:
+                data = map_file(f)
+                try:
+                    # a valid snapshot has at least the magic and the sequence number
+                    if len(data) < 12 or data[:4] != SNAPSHOT_MAGIC:
+                        raise ValueError(f'{self.snap_path} is not a graph snapshot')
+                    (snap_seq,) = struct.unpack_from('<Q', data, 4)
+                    snap_end = 12
+                    for snap_end, _, op, args in decode_records(data, 12):
+                        getattr(graph, op)(*args)
+                    # snapshots are written atomically, so stopping early means corruption
+                    if snap_end != len(data):
+                        raise ValueError(f'{self.snap_path} is corrupted at offset {snap_end}')
+                finally:
+                    if data:
+                        data.close()
+
+        # replay only the records newer than the snapshot
+        valid_end = 0
+        self.seq = snap_seq
+        if os.path.exists(self.log_path):
+            with open(self.log_path, 'rb') as f:
+                data = map_file(f)
+                try:
+                    for end, seq, op, args in decode_records(data):
+                        valid_end = end
+                        if seq > snap_seq:
+                            getattr(graph, op)(*args)
+                            self.seq = seq
+                            self.since_snapshot += 1
+                finally:
+                    if data:
+                        data.close()
+
+        self.file = open(self.log_path, 'ab')
+        self.file.truncate(valid_end)
+        self.graph = graph
+        graph._mutation_log = self
+        return graph
+
+    def attach(self, graph) -> None:
+        """
+        Starts logging the mutations of an existing GRAPH. Its current state is written
+        as a snapshot first, so the log only needs to hold what happens next.
+        """
+        self.graph = graph
+        if self.file is None:
+            self.file = open(self.log_path, 'ab')
+        self.snapshot()
+        graph._mutation_log = self
+
+    def encode(self, op, args) -> bytes:
+        """
+        Encodes one mutation for append(). Called by the graph before it applies the mutation,
+        so arguments the log cannot store raise before the graph changes.
+        """
+        return encode_body(op, args)
+
+    def append(self, body) -> None:
+        """
+        Records one mutation encoded by encode(). Called by the graph after the mutation
+        was applied, so a snapshot taken from here already contains it.
+        """
+        self.seq += 1
+        self.buffer += frame_record(self.seq, body)
+        self.pending += 1
+        self.since_snapshot += 1
+
+        if self.pending >= self.sync_every:
+            self.flush()
+        if self.snapshot_every is not None and self.since_snapshot >= self.snapshot_every:
+            self.snapshot()
+
+    def flush(self) -> None:
+        """
+        Writes the buffered records and fsyncs the log
+        """
+        if self.buffer:
+            self.file.write(self.buffer)
+            self.buffer = bytearray()
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending = 0
+
+    def snapshot(self) -> None:
+        """
+        Writes a compacted snapshot of the attached graph and truncates the log. The snapshot
+        is written to a temporary file and renamed, so a crash keeps the previous one.
+        Records still in the log after a crash are skipped by their sequence number.
+        """
+        graph = self.graph
+        records = bytearray()
+        if hasattr(graph, 'adj_matrix'):
+            for _ in range(graph.v_count):
+                records += encode_record(self.seq, 'add_vertex', ())
+            for src, dst, weight in graph.get_edges():
+                records += encode_record(self.seq, 'add_edge', (src, dst, weight))
+        else:
+            # vertices first, so isolated vertices are kept
+            for v in graph.get_vertices():
+                records += encode_record(self.seq, 'add_vertex', (v,))
+            for u, v in graph.get_edges():
+                records += encode_record(self.seq, 'add_edge', (u, v))
+
+        tmp_path = self.snap_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(SNAPSHOT_MAGIC + struct.pack('<Q', self.seq) + records)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snap_path)
+        # the rename must be durable before the log it replaces is cut
+        fsync_dir(os.path.dirname(self.snap_path))
+
+        # everything in the log is now covered by the snapshot
+        self.buffer = bytearray()
+        self.pending = 0
+        self.since_snapshot = 0
+        self.file.truncate(0)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self) -> None:
+        """
+        Flushes the log and detaches it from the graph
+        """
+        if self.file is None:
+            return
+        self.flush()
+        self.file.close()
+        self.file = None
+        if self.graph is not None:
+            self.graph._mutation_log = None
+
+
+if __name__ == '__main__':
+
+    import tempfile
+    from d_graph import DirectedGraph
+    from ud_graph import UndirectedGraph
+
+    print("\nmethod recover() example 1")
+    print("--------------------------")
+    path = os.path.join(tempfile.mkdtemp(), 'routes')
+    log = GraphLog(path, sync_every=4, snapshot_every=None)
+    g = log.recover(DirectedGraph)
+    for _ in range(5):
+        g.add_vertex()
+    edges = [(0, 1, 10), (4, 0, 12), (1, 4, 15), (4, 3, 3),
+             (3, 1, 5), (2, 1, 23), (3, 2, 7)]
+    for src, dst, weight in edges:
+        g.add_edge(src, dst, weight)
+    log.snapshot()
+    g.remove_edge(4, 3)
+    log.close()
+    print(GraphLog(path).recover(DirectedGraph))
+
+    print("\nmethod attach() example 1")
+    print("-------------------------")
+    path = os.path.join(tempfile.mkdtemp(), 'network')
+    g = UndirectedGraph(['AB', 'AC', 'BC', 'BD', 'CD', 'CE', 'DE'])
+    log = GraphLog(path)
+    log.attach(g)
+    g.remove_vertex('D')
+    g.add_vertex('Z')
+    log.close()
+    print(GraphLog(path).recover(UndirectedGraph))
@@ -0,0 +1,249 @@
+# Course: 261
+# Author: Savanna Hanson
+# Assignment: 5 - Graph Implementation
+# Description: Bulk path validation shared by DirectedGraph and UndirectedGraph. Paths are stored
+# as a ragged array (flat vertex array + offsets) and every hop is checked at once against a
+# sorted array of edge keys. The kernel doing the work is picked at runtime, NumPy or pure Python.
+# Set GRAPH_KERNEL to python or numpy to force one. NumPy is needed for the results and is only
+# imported the first time paths are validated.
+
+import os
+
+
+KERNEL_ENV = 'GRAPH_KERNEL'
+
+# below this many vertices, NumPy's per-call overhead costs more than a pure Python loop
+NUMPY_MIN_SIZE = 256
+
+# NumPy module once it has been imported, False if it is not installed
+_numpy = None
+
+
+def to_ragged(paths=None, flat=None, offsets=None):
+    """
+    Returns the ragged array (flat, offsets) for either a list of PATHS, or an already built
+    FLAT vertex sequence with OFFSETS, where path i is flat[offsets[i]:offsets[i + 1]].
+    An already built FLAT / OFFSETS is returned unchanged, so NumPy arrays are not copied.
+    """
+    if paths is not None:
+        if flat is not None or offsets is not None:
+            raise ValueError('pass either paths or flat and offsets, not both')
+    elif flat is None or offsets is None:
+        raise ValueError('pass either paths or both flat and offsets')
+    else:
+        return flat, offsets
+
+    flat = []
+    offsets = [0]
+    for path in paths:
+        flat.extend(path)
+        offsets.append(len(flat))
+    return flat, offsets
+
+
+def _require_numpy():
+    """
+    Returns the NumPy module. Raises ImportError if it is not installed.
+    """
+    np = _load_numpy()
+    if np is None:
+        raise ImportError('validating paths needs NumPy, which is not installed')
+    return np
+
+
+def _load_numpy():
+    """
+    Imports NumPy on first use. Returns None if it is not installed.
+    """
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy or None
+
+
+class EdgeIndex:
+    """
+    Class to implement the edge index of one graph state. The graphs build it on the first
+    validate_paths call and drop it on their next mutation.
+    - vertices are coded 0 .. n_vertices - 1
+    - keys is a sorted int64 array of src * n_vertices + dst for every edge
+    - names is the sorted array of vertex names, None when the vertices already are codes
+    """
+
+    def __init__(self, np, n_vertices, keys, names=None):
+        """
+        Store the index. Use from_matrix() or from_adj_list() to build one.
+        """
+        self.np = np
+        self.n_vertices = n_vertices
+        self.keys = keys
+        self.names = names
+        self._lookup = None
+        self._key_set = None
+
+    @classmethod
+    def from_matrix(cls, adj_matrix):
+        """
+        Builds the index of an adjacency matrix. The non-zero cells in row-major order are
+        exactly the edge keys, already sorted.
+        """
+        np = _require_numpy()
+        keys = np.flatnonzero(np.array(adj_matrix, dtype=np.int64).reshape(-1))
+        return cls(np, len(adj_matrix), keys.astype(np.int64))
+
+    @classmethod
+    def from_adj_list(cls, adj_list):
+        """
+        Builds the index of an adjacency list. Vertices are coded by their position in the
+        sorted vertex names, so both edges and paths are coded with np.searchsorted.
+        """
+        np = _require_numpy()
+        names = np.unique(np.array(list(adj_list)))
+        src = np.array([u for u in adj_list for _ in adj_list[u]])
+        dst = np.array([v for u in adj_list for v in adj_list[u]])
+        n = len(names)
+        if len(src):
+            keys = np.sort(np.searchsorted(names, src) * n + np.searchsorted(names, dst))
+        else:
+            keys = np.zeros(0, dtype=np.int64)
+        return cls(np, n, keys.astype(np.int64), names)
+
+    @property
+    def key_set(self) -> set:
+        """Set of the edge keys, built on first use by the pure Python kernel"""
+        if self._key_set is None:
+            self._key_set = set(self.keys.tolist())
+        return self._key_set
+
+    def codes(self, flat):
+        """
+        Returns the vertex codes of FLAT, -1 for vertices that are not in the graph.
+        Vertices that are already codes are returned unchanged.
+        """
+        if self.names is None:
+            return flat
+        np = self.np
+        values = np.asarray(flat)
+        if len(values) == 0:
+            return np.zeros(0, dtype=np.int64)
+        if values.dtype.kind != self.names.dtype.kind or values.dtype.kind == 'O':
+            # names of another type than the graph's cannot be searched, look them up one by one
+            if self._lookup is None:
+                self._lookup = {v: i for i, v in enumerate(self.names.tolist())}
+            return np.array([self._lookup.get(v, -1) for v in flat], dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self.names, values), len(self.names) - 1)
+        return np.where(self.names[pos] == values, pos, -1)
+
+
+def select_kernel(size=0) -> str:
+    """
+    Returns the name of the kernel to use for SIZE flat vertices: 'numpy' or 'python'.
+    GRAPH_KERNEL overrides the choice. Otherwise NumPy is only used for batches
+    big enough to pay for its per-call overhead.
+    """
+    forced = os.environ.get(KERNEL_ENV)
+    if forced:
+        if forced not in ('numpy', 'python'):
+            raise ValueError(f'{KERNEL_ENV} must be numpy or python, not {forced!r}')
+        return forced
+
+    if size >= NUMPY_MIN_SIZE:
+        return 'numpy'
+    return 'python'
+
+
+def validate_ragged(flat, offsets, edge_index):
+    """
+    Validates every path of a ragged array at once against EDGE_INDEX (an EdgeIndex).
+    Vertices of FLAT that are not in the graph are unknown vertices.
+    Returns a boolean array (True if the path is valid) and an int array with the index
+    of the first failing hop of each path, -1 for valid paths. A one-vertex path with an
+    unknown vertex fails at hop 0, an empty path is valid.
+    Both results are always NumPy arrays (bool and int64), whichever kernel ran.
+    """
+    np = edge_index.np
+    codes = edge_index.codes(flat)
+    n = edge_index.n_vertices
+
+    if select_kernel(len(codes)) == 'python':
+        if isinstance(codes, np.ndarray):
+            codes = codes.tolist()
+        valid, first_fail = _validate_python(codes, offsets, n, edge_index.key_set)
+        return np.array(valid, dtype=bool), np.array(first_fail, dtype=np.int64)
+    return _validate_numpy(np, codes, offsets, n, edge_index.keys)
+
+
+def _validate_python(flat, offsets, n_vertices, edges):
+    """
+    Pure Python kernel for validate_ragged, one hop at a time against the set of edge keys
+    """
+    valid = []
+    first_fail = []
+
+    for i in range(len(offsets) - 1):
+        start, end = offsets[i], offsets[i + 1]
+        fail = -1
+        if end - start == 1 and not 0 <= flat[start] < n_vertices:
+            fail = 0
+        for k in range(start, end - 1):
+            src, dst = flat[k], flat[k + 1]
+            if not (0 <= src < n_vertices and 0 <= dst < n_vertices
+                    and src * n_vertices + dst in edges):
+                fail = k - start
+                break
+        valid.append(fail == -1)
+        first_fail.append(fail)
+
+    return valid, first_fail
+
+
+def _validate_numpy(np, flat, offsets, n_vertices, edge_keys):
+    """
+    NumPy kernel for validate_ragged, all hops at once with np.searchsorted
+    """
+    flat = np.asarray(flat, dtype=np.int64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    edge_keys = np.asarray(edge_keys, dtype=np.int64)
+    n_paths = len(offsets) - 1
+
+    known = (flat >= 0) & (flat < n_vertices)
+    bad = np.zeros(len(flat), dtype=bool)
+
+    # a hop starts at every position except the last vertex of each path
+    if len(flat) > 1:
+        src = flat[:-1]
+        dst = flat[1:]
+        keys = np.where(known[:-1] & known[1:], src * n_vertices + dst, -1)
+        pos = np.searchsorted(edge_keys, keys)
+        pos = np.minimum(pos, max(len(edge_keys) - 1, 0))
+        if len(edge_keys):
+            has_edge = (keys >= 0) & (edge_keys[pos] == keys)
+        else:
+            has_edge = np.zeros(len(keys), dtype=bool)
+        bad[:-1] = ~has_edge
+
+    ends = offsets[1:]
+    starts = offsets[:-1]
+    lengths = ends - starts
+    last = ends[lengths > 0] - 1
+    bad[last] = False
+
+    # one-vertex paths only need the vertex to exist
+    single = starts[lengths == 1]
+    bad[single] = ~known[single]
+
+    # first bad position inside each path
+    bad_idx = np.flatnonzero(bad)
+    first_fail = np.full(n_paths, -1, dtype=np.int64)
+    if len(bad_idx):
+        j = np.searchsorted(bad_idx, starts)
+        in_range = j < len(bad_idx)
+        first = bad_idx[np.minimum(j, len(bad_idx) - 1)]
+        hit = in_range & (first < ends)
+        first_fail[hit] = first[hit] - starts[hit]
+
+    return first_fail == -1, first_fail
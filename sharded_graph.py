@@ -0,0 +1,466 @@
+# Course: 261
+# Author: Savanna Hanson
+# Assignment: 5 - Graph Implementation
+# Description: A sharded graph whose vertices are partitioned across worker processes. Each shard
+# keeps the adjacency and the per-query state (distances, labels, visited marks) of the vertices it
+# owns, relaxes its own vertices locally, and only sends (vertex, value) messages for edges that
+# cross into another shard. bfs, dijkstra and count_connected_components run as synchronous
+# rounds in which the coordinator just routes those messages over local pipes.
+
+import heapq
+import zlib
+from collections import deque
+
+
+def hash_partition(vertices, edges, n_shards) -> dict:
+    """
+    Assigns every vertex to a shard by a crc32 of its name. EDGES is not used.
+    Unlike hash(), the result is the same in every process and on every run.
+    Returns a dict with vertex as key and shard index as value.
+    """
+    return {v: zlib.crc32(str(v).encode('utf-8')) % n_shards for v in vertices}
+
+
+def locality_partition(vertices, edges, n_shards) -> dict:
+    """
+    Assigns vertices to shards in BFS order, so neighboring vertices tend to land in the
+    same shard and fewer frontier vertices have to cross shards. Every shard gets
+    roughly the same number of vertices.
+    """
+    neighbors = {v: [] for v in vertices}
+    for u, v, _ in edges:
+        neighbors[u].append(v)
+        neighbors[v].append(u)
+
+    order = []
+    seen = set()
+    for start in vertices:
+        if start in seen:
+            continue
+        seen.add(start)
+        queue = deque([start])
+        while queue:
+            v = queue.popleft()
+            order.append(v)
+            for u in sorted(neighbors[v]):
+                if u not in seen:
+                    seen.add(u)
+                    queue.append(u)
+
+    size = max(1, -(-len(order) // n_shards))
+    return {v: i // size for i, v in enumerate(order)}
+
+
+class _Shard:
+    """
+    Class to implement the state of one shard, living in its worker process
+    - out_edges maps each owned vertex to {neighbor: (weight, shard of neighbor)}
+    - in_edges is the same for incoming edges, only filled for directed graphs
+    - dist / label / seen hold the per-query state of the owned vertices
+    - sent caches the best value already sent for each remote vertex in the current query
+    """
+
+    def __init__(self, index):
+        """
+        Start with no vertices
+        """
+        self.index = index
+        self.out_edges = {}
+        self.in_edges = {}
+        self.dist = {}
+        self.label = {}
+        self.ids = {}
+        self.seen = set()
+        self.pending = {}
+        self.sent = {}
+
+    # mutators, sent by the coordinator without waiting for a reply
+
+    def add_vertex(self, v) -> None:
+        self.out_edges.setdefault(v, {})
+        self.in_edges.setdefault(v, {})
+
+    def add_out(self, edge) -> None:
+        v, u, weight, owner = edge
+        self.add_vertex(v)
+        self.out_edges[v][u] = (weight, owner)
+
+    def add_in(self, edge) -> None:
+        v, u, weight, owner = edge
+        self.add_vertex(v)
+        self.in_edges[v][u] = (weight, owner)
+
+    def remove_out(self, edge) -> None:
+        v, u = edge
+        self.out_edges.get(v, {}).pop(u, None)
+
+    def remove_in(self, edge) -> None:
+        v, u = edge
+        self.in_edges.get(v, {}).pop(u, None)
+
+    # queries, each one returns the reply for the coordinator
+
+    def _send(self, outbox, owner, u, value) -> None:
+        """Helper that queues VALUE for remote vertex u unless something as good was sent already"""
+        if u not in self.sent or value < self.sent[u]:
+            self.sent[u] = value
+            outbox.setdefault(owner, {})[u] = value
+
+    def sssp_start(self, _) -> bool:
+        self.dist = {v: float('inf') for v in self.out_edges}
+        self.sent = {}
+        return True
+
+    def sssp_step(self, inbox) -> dict:
+        """
+        Applies the candidate distances in INBOX, runs Dijkstra over the owned vertices and
+        returns the candidates for remote vertices as {shard: [(vertex, distance)]}
+        """
+        hq = []
+        count = 0
+        for v, d in inbox:
+            if d < self.dist[v]:
+                self.dist[v] = d
+                heapq.heappush(hq, (d, count, v))
+                count += 1
+
+        outbox = {}
+        while hq:
+            (d, _, v) = heapq.heappop(hq)
+            if d > self.dist[v]:
+                continue
+            for u, (weight, owner) in self.out_edges[v].items():
+                if owner != self.index:
+                    self._send(outbox, owner, u, d + weight)
+                elif d + weight < self.dist[u]:
+                    self.dist[u] = d + weight
+                    heapq.heappush(hq, (d + weight, count, u))
+                    count += 1
+
+        return {owner: list(msgs.items()) for owner, msgs in outbox.items()}
+
+    def sssp_result(self, _) -> dict:
+        return self.dist
+
+    def bfs_start(self, v_start) -> bool:
+        self.seen = {v_start} if v_start in self.out_edges else set()
+        self.pending = {}
+        return True
+
+    def bfs_expand(self, frontier) -> dict:
+        """
+        Expands the owned frontier vertices, given as (vertex, rank in visit order). Every
+        neighbor gets the key (parent rank, position in the sorted neighbor list), the smallest
+        key decides the visit order. Keys for owned vertices are kept for bfs_collect, keys for
+        remote vertices are returned as {shard: [(vertex, key)]}.
+        """
+        outbox = {}
+        for v, rank in frontier:
+            for i, u in enumerate(sorted(self.out_edges[v])):
+                key = (rank, i)
+                owner = self.out_edges[v][u][1]
+                if owner == self.index:
+                    if u not in self.seen and (u not in self.pending or key < self.pending[u]):
+                        self.pending[u] = key
+                else:
+                    msgs = outbox.setdefault(owner, {})
+                    if u not in msgs or key < msgs[u]:
+                        msgs[u] = key
+        return {owner: list(msgs.items()) for owner, msgs in outbox.items()}
+
+    def bfs_collect(self, inbox) -> []:
+        """
+        Merges the keys from other shards with the local ones and marks the newly reached
+        owned vertices as seen. Returns them as [(key, vertex)].
+        """
+        for u, key in inbox:
+            if u not in self.seen and (u not in self.pending or key < self.pending[u]):
+                self.pending[u] = key
+        reached = [(key, u) for u, key in self.pending.items()]
+        self.seen.update(self.pending)
+        self.pending = {}
+        return reached
+
+    def _neighbors(self, v):
+        """Helper that returns (neighbor, (weight, owner)) pairs in both directions"""
+        yield from self.out_edges[v].items()
+        yield from self.in_edges[v].items()
+
+    def _propagate(self, queue) -> dict:
+        """
+        Helper that pushes the labels of the vertices in QUEUE through the owned vertices and
+        returns the labels for remote vertices as {shard: [(vertex, label)]}
+        """
+        outbox = {}
+        while queue:
+            v = queue.pop()
+            label = self.label[v]
+            for u, (_, owner) in self._neighbors(v):
+                if owner != self.index:
+                    self._send(outbox, owner, u, label)
+                elif label < self.label[u]:
+                    self.label[u] = label
+                    queue.append(u)
+        return {owner: list(msgs.items()) for owner, msgs in outbox.items()}
+
+    def cc_start(self, _) -> dict:
+        """
+        Gives every owned vertex its own label (shard index, local index), so labels are unique
+        and comparable whatever the vertex names are, and settles them inside the shard
+        """
+        self.ids = {v: (self.index, i) for i, v in enumerate(self.out_edges)}
+        self.label = dict(self.ids)
+        self.sent = {}
+        return self._propagate(list(self.out_edges))
+
+    def cc_step(self, inbox) -> dict:
+        queue = []
+        for v, label in inbox:
+            if label < self.label[v]:
+                self.label[v] = label
+                queue.append(v)
+        return self._propagate(queue)
+
+    def cc_count(self, _) -> int:
+        # every component keeps exactly one vertex whose label is still its own id
+        return sum(1 for v in self.label if self.label[v] == self.ids[v])
+
+
+def _shard_worker(conn, index) -> None:
+    """
+    Main loop of a shard process. Runs the _Shard method named by each message until it
+    receives 'stop'. Mutators return None and get no reply, so they can be pipelined.
+    """
+    shard = _Shard(index)
+    while True:
+        command, payload = conn.recv()
+        if command == 'stop':
+            break
+        reply = getattr(shard, command)(payload)
+        if reply is not None:
+            conn.send(reply)
+    conn.close()
+
+
+class ShardedGraph:
+    """
+    Class to implement a graph partitioned across worker processes
+    - edges are (src, dst, weight) tuples, weight defaults to 1 for (src, dst) pairs
+    - directed=False stores every edge at both of its vertices
+    - partitioner is hash_partition, locality_partition, or any function taking
+      (vertices, edges, n_shards) and returning a dict of vertex -> shard index
+    - the coordinator only keeps owner, the routing table of vertex -> shard. Vertices added
+      later that the partitioner never saw are placed with hash_partition.
+    """
+
+    def __init__(self, start_edges=None, n_shards=2, directed=True, partitioner=hash_partition):
+        """
+        Partition the vertices, start one worker process per shard and load the edges
+        """
+        self.directed = directed
+        self.n_shards = n_shards
+
+        edges = []
+        vertices = {}
+        for edge in start_edges or []:
+            u, v = edge[0], edge[1]
+            weight = edge[2] if len(edge) > 2 else 1
+            if u == v:
+                continue
+            edges.append((u, v, weight))
+            vertices[u] = None
+            vertices[v] = None
+
+        self.owner = partitioner(list(vertices), edges, n_shards)
+
+        # only pay for importing multiprocessing once a sharded graph is actually built
+        import multiprocessing
+
+        self.conns = []
+        self.workers = []
+        for i in range(n_shards):
+            parent_conn, child_conn = multiprocessing.Pipe()
+            worker = multiprocessing.Process(target=_shard_worker, args=(child_conn, i),
+                                             daemon=True)
+            worker.start()
+            child_conn.close()
+            self.conns.append(parent_conn)
+            self.workers.append(worker)
+
+        for v in vertices:
+            self.add_vertex(v)
+        for u, v, weight in edges:
+            self.add_edge(u, v, weight)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        """
+        Stops all shard processes
+        """
+        for conn in self.conns:
+            try:
+                conn.send(('stop', None))
+                conn.close()
+            except (BrokenPipeError, OSError):
+                pass
+        for worker in self.workers:
+            worker.join()
+        self.conns = []
+        self.workers = []
+
+    # ------------------------------------------------------------------ #
+
+    def add_vertex(self, v) -> None:
+        """
+        Adds vertex v to its owning shard. Does nothing if v is already in the graph.
+        """
+        if v not in self.owner:
+            self.owner[v] = hash_partition([v], [], self.n_shards)[v]
+        self.conns[self.owner[v]].send(('add_vertex', v))
+
+    def add_edge(self, u, v, weight=1) -> None:
+        """
+        Adds an edge, or updates its weight if it is already present. Missing vertices are
+        added first. Loops are ignored.
+        """
+        if u == v:
+            return
+        self.add_vertex(u)
+        self.add_vertex(v)
+        owner_u, owner_v = self.owner[u], self.owner[v]
+
+        self.conns[owner_u].send(('add_out', (u, v, weight, owner_v)))
+        if self.directed:
+            self.conns[owner_v].send(('add_in', (v, u, weight, owner_u)))
+        else:
+            self.conns[owner_v].send(('add_out', (v, u, weight, owner_u)))
+
+    def remove_edge(self, u, v) -> None:
+        """
+        Removes an edge. Does nothing if either vertex or the edge does not exist.
+        """
+        if u not in self.owner or v not in self.owner:
+            return
+
+        self.conns[self.owner[u]].send(('remove_out', (u, v)))
+        if self.directed:
+            self.conns[self.owner[v]].send(('remove_in', (v, u)))
+        else:
+            self.conns[self.owner[v]].send(('remove_out', (v, u)))
+
+    # ------------------------------------------------------------------ #
+
+    def _ask(self, requests) -> dict:
+        """
+        Sends (command, payload) to the shards given as {shard: (command, payload)}
+        and returns their replies as {shard: reply}. All requests are sent before any
+        reply is read, so the shards work in parallel.
+        """
+        for i, request in requests.items():
+            self.conns[i].send(request)
+        return {i: self.conns[i].recv() for i in requests}
+
+    def _rounds(self, command, outboxes) -> None:
+        """
+        Routes the cross-shard messages in OUTBOXES (replies of the form {shard: [messages]})
+        to their shards with COMMAND, round after round, until no shard sends anything.
+        """
+        while True:
+            inboxes = {}
+            for outbox in outboxes:
+                for i, msgs in outbox.items():
+                    inboxes.setdefault(i, []).extend(msgs)
+            if not inboxes:
+                return
+            outboxes = self._ask({i: (command, msgs) for i, msgs in inboxes.items()}).values()
+
+    def _everyone(self, command, payload=None) -> dict:
+        """Helper that sends the same command to every shard"""
+        return self._ask({i: (command, payload) for i in range(self.n_shards)})
+
+    def bfs(self, v_start, v_end=None) -> []:
+        """
+        Return list of vertices visited during BFS search, in the order they were visited.
+        Neighbors are picked in sorted order. Each level is one round over the shards: the
+        frontier shards expand their vertices, and every shard reports the vertices it reached.
+        """
+        if v_start not in self.owner:
+            return []
+
+        self._everyone('bfs_start', v_start)
+        visited_vertices = [v_start]
+        if v_start == v_end:
+            return visited_vertices
+        frontier = {self.owner[v_start]: [(v_start, 0)]}
+
+        while frontier:
+            outboxes = self._ask({i: ('bfs_expand', part) for i, part in frontier.items()})
+            inboxes = {i: [] for i in frontier}
+            for outbox in outboxes.values():
+                for i, msgs in outbox.items():
+                    inboxes.setdefault(i, []).extend(msgs)
+
+            reached = []
+            for part in self._ask({i: ('bfs_collect', msgs) for i, msgs in inboxes.items()}).values():
+                reached.extend(part)
+            reached.sort(key=lambda item: item[0])
+
+            frontier = {}
+            for _, u in reached:
+                visited_vertices.append(u)
+                if u == v_end:
+                    return visited_vertices
+                frontier.setdefault(self.owner[u], []).append((u, len(visited_vertices) - 1))
+
+        return visited_vertices
+
+    def dijkstra(self, src) -> dict:
+        """
+        Return the length of the shortest path from SRC to every vertex as a dict. Unreachable
+        vertices are infinity. Every shard settles its own vertices with Dijkstra and only sends
+        candidate distances over edges into other shards, until no distance improves.
+        """
+        self._everyone('sssp_start')
+        if src in self.owner:
+            self._rounds('sssp_step', [{self.owner[src]: [(src, 0)]}])
+
+        dist = {}
+        for part in self._everyone('sssp_result').values():
+            dist.update(part)
+        return {v: dist[v] for v in self.owner}
+
+    def count_connected_components(self) -> int:
+        """
+        Return number of connected components in the graph (weakly connected when directed).
+        Every vertex starts with its own label and the smallest label spreads to the neighbors,
+        inside a shard directly and across shards as messages. All components advance in the
+        same rounds, so the number of rounds depends on the largest component diameter.
+        """
+        self._rounds('cc_step', self._everyone('cc_start').values())
+        return sum(self._everyone('cc_count').values())
+
+
+if __name__ == '__main__':
+
+    print("\nmethod bfs() / dijkstra() example 1")
+    print("-----------------------------------")
+    edges = [(0, 1, 10), (4, 0, 12), (1, 4, 15), (4, 3, 3),
+             (3, 1, 5), (2, 1, 23), (3, 2, 7)]
+    with ShardedGraph(edges, n_shards=3) as g:
+        for start in range(5):
+            print(f'{start} BFS:{g.bfs(start)} DIJKSTRA:{g.dijkstra(start)}')
+
+    print("\nmethod count_connected_components() example 1")
+    print("---------------------------------------------")
+    edges = ['AE', 'AC', 'BE', 'CE', 'CD', 'CB', 'BD', 'ED', 'BH', 'QG', 'FG']
+    with ShardedGraph(edges, n_shards=2, directed=False, partitioner=locality_partition) as g:
+        print(g.count_connected_components())
+        print(g.bfs('A'), g.bfs('A', 'H'))
+        g.remove_edge('B', 'H')
+        g.add_edge('Q', 'H')
+        print(g.count_connected_components(), g.bfs('G'))
@@ -4,10 +4,14 @@
 # Description: An undirected graph ADT with vertices and edges stored as an adjacency list.
 # In addtion to methods for adding, removing, and getting edges and vertices, there are also methods for
 # checking whether a given path is valid, for depth and breadth first searches, counting connected components,
-# and checking if the graph is cyclic.
+# and checking if the graph is cyclic. validate_paths checks many paths at once, and degree counters
+# are maintained incrementally (degree, top_degree, degree_histogram).
 
 from collections import deque
 
+from degree_index import DegreeIndex
+from path_kernels import EdgeIndex, to_ragged, validate_ragged
+
 class UndirectedGraph:
     """
     Class to implement undirected graph
@@ -51,7 +55,10 @@ class UndirectedGraph:
         if v in self.adj_list:
             return None
 
+        entry = self._encode('add_vertex', v)
+        self._get_degree_index().add(v)
         self.adj_list[v] = []
+        self._record(entry)
 
 
     def add_edge(self, u: str, v: str) -> None:
@@ -60,6 +67,8 @@ class UndirectedGraph:
         """
         if u == v:
             return
+        # encoded first, so a name the log cannot store adds neither vertex
+        entry = self._encode('add_edge', u, v)
 
         # add vertices if needed
         if u not in self.adj_list:
@@ -70,8 +79,11 @@ class UndirectedGraph:
         # add edges
         if v not in self.adj_list[u]:
             self.adj_list[u].append(v)
-        if u not in self.adj_list[v]:
             self.adj_list[v].append(u)
+            index = self._get_degree_index()
+            index.change(u, 1)
+            index.change(v, 1)
+            self._record(entry)
 
     def remove_edge(self, v: str, u: str) -> None:
         """
@@ -79,9 +91,13 @@ class UndirectedGraph:
         """
         if v in self.adj_list and u in self.adj_list:
             if u in self.adj_list[v]:
+                entry = self._encode('remove_edge', v, u)
                 self.adj_list[v].remove(u)
-            if v in self.adj_list[u]:
                 self.adj_list[u].remove(v)
+                index = self._get_degree_index()
+                index.change(u, -1)
+                index.change(v, -1)
+                self._record(entry)
         else:
             return None
 
@@ -91,15 +107,65 @@ class UndirectedGraph:
         Remove vertex and all connected edges
         """
         if v in self.adj_list:
-            # delete instances of vertex v in other lists
-            for i in self.adj_list:
-                if v in self.adj_list[i]:
-                    self.adj_list[i].remove(v)
+            entry = self._encode('remove_vertex', v)
+            index = self._get_degree_index()
+            # delete instances of vertex v in the lists of its neighbors
+            for i in self.adj_list[v]:
+                self.adj_list[i].remove(v)
+                index.change(i, -1)
             # delete vertex v
+            index.remove(v)
             del self.adj_list[v]
+            self._record(entry)
         else:
             return None
 
+    def _encode(self, op, *args):
+        """
+        Encode a mutation for the attached GraphLog (see graph_log.py) before it is applied,
+        so a value the log cannot store raises before the graph changes. None if no log
+        """
+        log = getattr(self, '_mutation_log', None)
+        if log is None:
+            return None
+        return log.encode(op, args)
+
+    def _record(self, entry) -> None:
+        """
+        Write a mutation encoded by _encode to the attached GraphLog, if there is one
+        Every mutation goes through here, so it also drops the cached edge index
+        """
+        self._edge_index = None
+        if entry is not None:
+            self._mutation_log.append(entry)
+
+    def _get_degree_index(self):
+        """
+        Return the DegreeIndex of the graph. It is built from the adjacency list the first time
+        and kept up to date by add_vertex, add_edge, remove_edge and remove_vertex afterwards.
+        """
+        if not hasattr(self, '_degree_index'):
+            self._degree_index = DegreeIndex({v: len(self.adj_list[v]) for v in self.adj_list})
+        return self._degree_index
+
+    def degree(self, v: str):
+        """
+        Return number of edges of vertex v, None if v is not in the graph
+        """
+        return self._get_degree_index().degree.get(v)
+
+    def top_degree(self, k: int) -> []:
+        """
+        Return up to k (vertex, degree) tuples with the highest degree, highest first
+        """
+        return self._get_degree_index().top(k)
+
+    def degree_histogram(self) -> dict:
+        """
+        Return dict of degree -> number of vertices with that degree
+        """
+        return self._get_degree_index().histogram()
+
     def get_vertices(self) -> []:
         """
         Return list of vertices in the graph (any order)
@@ -146,6 +212,20 @@ class UndirectedGraph:
 
         return True
 
+    def validate_paths(self, paths=None, flat=None, offsets=None):
+        """
+        Validate many paths at once, given as a list of PATHS or as FLAT vertices + OFFSETS.
+        Return a boolean array of valid paths and the first failing hop of each path (-1 if valid)
+        Both results are NumPy arrays, NumPy is imported on the first call
+        """
+        flat, offsets = to_ragged(paths, flat, offsets)
+
+        # the index numbers the vertices so every edge becomes an integer key
+        if getattr(self, '_edge_index', None) is None:
+            self._edge_index = EdgeIndex.from_adj_list(self.adj_list)
+
+        return validate_ragged(flat, offsets, self._edge_index)
+
     def dfs(self, v_start, v_end=None) -> []:
         """
         Return list of vertices visited during DFS search